@@ -1,23 +1,3 @@
-# import os
-# from dotenv import load_dotenv
-
-# load_dotenv()
-
-# # Azure Document Intelligence
-# AZURE_DOC_INTELLIGENCE_ENDPOINT = os.getenv("AZURE_DOC_INTELLIGENCE_ENDPOINT", "https://tetratech-doc-intelligence.cognitiveservices.azure.com/")
-# AZURE_DOC_INTELLIGENCE_KEY = os.getenv("AZURE_DOC_INTELLIGENCE_KEY", "CKHhGcDGXL1j0iyML5IEhnshRM6RTTHuKFa4bC5cTS86FBBSeySPJQQJ99BFACHYHv6XJ3w3AAALACOGW54W")
-
-# # Storage paths
-# TABLES_DIR = "extracted_content/tables"
-# IMAGES_DIR = "extracted_content/images"
-# TEXT_DIR = "extracted_content/text"
-
-# # Text processing
-# MAX_CHUNK_SIZE = 1000
-# CHUNK_OVERLAP = 200
-
-# # Supported file types
-# SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.xlsx']
 import os
 from dotenv import load_dotenv
 
@@ -26,6 +6,14 @@ load_dotenv()
 # Azure Document Intelligence (existing)
 AZURE_DOC_INTELLIGENCE_ENDPOINT = os.getenv("AZURE_DOC_INTELLIGENCE_ENDPOINT", "https://tetratech-doc-intelligence.cognitiveservices.azure.com/")
 AZURE_DOC_INTELLIGENCE_KEY = os.getenv("AZURE_DOC_INTELLIGENCE_KEY", "CKHhGcDGXL1j0iyML5IEhnshRM6RTTHuKFa4bC5cTS86FBBSeySPJQQJ99BFACHYHv6XJ3w3AAALACOGW54W")
+AZURE_MAX_CONCURRENT_REQUESTS = int(os.getenv("AZURE_MAX_CONCURRENT_REQUESTS", "4"))  # Documents analyzed in parallel
+FIGURE_DOWNLOAD_CONCURRENCY = 8  # Figure images fetched in parallel per document
+AZURE_RETRY_ATTEMPTS = 3  # Total attempts for throttled (429) or 5xx analyze calls
+AZURE_POLL_RETRY_ATTEMPTS = 10  # Status-poll attempts per analysis; a failed poll resumes, it doesn't re-upload
+AZURE_RETRY_MAX_WAIT = 30  # Seconds; backoff goes 1s, 2s, 4s... (plus jitter, or Retry-After) up to this cap
+DOCUMENT_BATCH_SIZE = int(os.getenv("DOCUMENT_BATCH_SIZE", "16"))  # Documents submitted per batch
+RESULT_CACHE_TTL = 24 * 60 * 60  # Seconds a processed result is reused for identical uploads
+RESULT_CACHE_MAX_ENTRIES = 32
 
 
 # Storage paths (existing)
@@ -34,5 +22,13 @@ IMAGES_DIR = "extracted_content/images"
 TEXT_DIR = "extracted_content/text"
 # CHUNKS_DIR = "extracted_content/chunks"  # NEW: Structure-aware chunks
 
+# Text processing (utils.helpers defaults)
+MAX_CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
 # Supported file types
-SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.xlsx']
\ No newline at end of file
+SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.xlsx']
+
+# Upload streaming
+UPLOAD_SPOOL_MAX_SIZE = 8 * 1024 * 1024  # Uploads larger than this spill to a temp file on disk
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
\ No newline at end of file
@@ -1,7 +1,11 @@
 import os
+import asyncio
+import itertools
+import time
 from processors import AzureDocumentProcessor, ContentExtractor, FileHandler
 from storage.local_storage import LocalStorage
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, BinaryIO, List, Tuple
+from config import AZURE_MAX_CONCURRENT_REQUESTS, DOCUMENT_BATCH_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES
 
 class DocumentProcessorMain:
     def __init__(self):
@@ -9,50 +13,132 @@ class DocumentProcessorMain:
         self.content_extractor = ContentExtractor()
         self.file_handler = FileHandler()
         self.storage = LocalStorage()
+        # (content digest, filename) -> (stored_at, result); insertion ordered for eviction
+        self._result_cache = {}
     
-    def process_document(self, uploaded_file, progress_callback=None) -> Dict[str, Any]:
-        """Main processing pipeline with Azure Document Intelligence"""
-        filename = uploaded_file.name
+    async def process_document_async(self, file_obj: BinaryIO, filename: str, progress_callback=None,
+                                     async_client=None) -> Dict[str, Any]:
+        """Main processing pipeline with Azure Document Intelligence
         
+        file_obj is a readable binary file-like positioned at the start of the
+        document; it is streamed to Azure rather than read into memory.
+        """
         try:
             # Validate file
             if not self.file_handler.validate_file(filename):
                 raise ValueError(f"Unsupported file format: {self.file_handler.get_file_extension(filename)}")
             
-            if progress_callback:
-                progress_callback("🔍 Converting file to bytes...")
-            
-            # Convert to bytes
-            file_bytes = self.file_handler.process_file(uploaded_file)
+            # Reuse results for a file we've already processed
+            cache_key = (await asyncio.to_thread(self.file_handler.file_digest, file_obj), filename)
+            cached_result = self._get_cached_result(cache_key, progress_callback)
+            if cached_result is not None:
+                return cached_result
             
             if progress_callback:
                 progress_callback("📄 Analyzing document with Azure Document Intelligence Layout Model...")
             
             # Analyze with Azure DI
-            result, client, operation_id = self.azure_processor.analyze_document(file_bytes, filename)
+            result, figure_images, _ = await self.azure_processor.analyze_document_async(
+                file_obj, filename, progress_callback, async_client
+            )
             
             if progress_callback:
                 progress_callback("📝 Extracting text, tables, and images...")
             
-            # Extract all content
-            extracted_content = self.content_extractor.extract_all_content(
-                result, 
-                filename, 
-                client=client, 
-                operation_id=operation_id
-            )
+            # Extraction and local saves are blocking; keep them off the event loop
+            try:
+                extracted_content = await asyncio.to_thread(
+                    self.content_extractor.extract_all_content,
+                    result,
+                    filename,
+                    figure_images=figure_images
+                )
+            finally:
+                for image_file in figure_images.values():
+                    image_file.close()
             
             if progress_callback:
                 progress_callback("💾 Saving extracted content...")
             
             # Finalize and return response
-            return self._finalize_response(extracted_content, filename)
+            response = self._finalize_response(extracted_content, filename)
+            self._store_result(cache_key, response)
+            return response
             
         except Exception as e:
             if progress_callback:
                 progress_callback(f"❌ Error processing document: {str(e)}")
             raise e
     
+    async def process_documents_batch(self, documents: List[Tuple[BinaryIO, str]], progress_callback=None,
+                                      batch_size: int = DOCUMENT_BATCH_SIZE,
+                                      max_concurrency: int = AZURE_MAX_CONCURRENT_REQUESTS) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield (filename, result or exception) for each document as soon as it finishes
+        
+        At most batch_size documents are submitted at a time, so a large upload
+        doesn't queue hundreds of tasks at once; each finished document frees a
+        slot for the next. A failed document is yielded with its exception and
+        never discards the ones that succeeded.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        remaining = iter(documents)
+        pending = set()
+        
+        # One client, and so one connection pool, for every document in the run
+        async with self.azure_processor.create_async_client() as async_client:
+            while True:
+                for file_obj, filename in itertools.islice(remaining, batch_size - len(pending)):
+                    pending.add(asyncio.ensure_future(
+                        self._process_guarded(semaphore, file_obj, filename, progress_callback, async_client)
+                    ))
+                if not pending:
+                    break
+                
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    yield task.result()
+    
+    async def _process_guarded(self, semaphore: asyncio.Semaphore, file_obj: BinaryIO, filename: str,
+                               progress_callback=None, async_client=None) -> Tuple[str, Any]:
+        """Process one document under the semaphore; returns (filename, result or exception)"""
+        def file_progress(message):
+            if progress_callback:
+                progress_callback(f"{filename}: {message}")
+        
+        async with semaphore:
+            try:
+                return filename, await self.process_document_async(file_obj, filename, file_progress, async_client)
+            except Exception as e:
+                return filename, e
+    
+    def _get_cached_result(self, cache_key: Tuple[str, str], progress_callback=None):
+        """Return an unexpired cached result for this content and filename, or None"""
+        entry = self._result_cache.get(cache_key)
+        if entry is None:
+            return None
+        
+        stored_at, result = entry
+        if time.monotonic() - stored_at > RESULT_CACHE_TTL:
+            self._result_cache.pop(cache_key, None)
+            return None
+        
+        # Saved files are named by filename, not content; another upload under the
+        # same name may have overwritten them, in which case this is processed again
+        if not self.storage.manifest_is_current(result.get("manifest", {})):
+            self._result_cache.pop(cache_key, None)
+            return None
+        
+        if progress_callback:
+            progress_callback("♻️ Document processed before; reusing saved results")
+        return result
+    
+    def _store_result(self, cache_key: Tuple[str, str], result: Dict):
+        """Cache a finished result, evicting the oldest entries beyond the size limit"""
+        self._result_cache.pop(cache_key, None)
+        self._result_cache[cache_key] = (time.monotonic(), result)
+        while len(self._result_cache) > RESULT_CACHE_MAX_ENTRIES:
+            self._result_cache.pop(next(iter(self._result_cache)), None)
+    
     def _finalize_response(self, content: Dict, filename: str) -> Dict:
         """Finalize response with metadata"""
         
@@ -71,6 +157,14 @@ class DocumentProcessorMain:
                 "image_count": len(content.get("images", []))
             }
         
+        # Record which files were saved, and their fingerprints for the result cache, so the
+        # UI doesn't rebuild expected names; its readers still stat each path for cache keys
+        content["manifest"] = self.storage.get_document_manifest(
+            filename,
+            content.get("tables", []),
+            content.get("images", [])
+        )
+        
         return content
 
 # Global instance for use in Streamlit
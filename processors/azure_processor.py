@@ -1,59 +1,222 @@
-from azure.ai.documentintelligence import DocumentIntelligenceClient
+from azure.ai.documentintelligence.aio import DocumentIntelligenceClient as AsyncDocumentIntelligenceClient
 from azure.ai.documentintelligence.models import AnalyzeOutputOption
 from azure.core.credentials import AzureKeyCredential
-from config import AZURE_DOC_INTELLIGENCE_ENDPOINT, AZURE_DOC_INTELLIGENCE_KEY
+from azure.core.exceptions import ServiceResponseError
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential, wait_random
+from config import (
+    AZURE_DOC_INTELLIGENCE_ENDPOINT,
+    AZURE_DOC_INTELLIGENCE_KEY,
+    FIGURE_DOWNLOAD_CONCURRENCY,
+    AZURE_RETRY_ATTEMPTS,
+    AZURE_POLL_RETRY_ATTEMPTS,
+    AZURE_RETRY_MAX_WAIT
+)
+from contextlib import AsyncExitStack
+from typing import IO, Dict, Union
+import asyncio
+import tempfile
+
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'doc': 'application/msword',
+    'xls': 'application/vnd.ms-excel'
+}
+
+def _is_transient_error(error: Exception) -> bool:
+    """Throttling, server errors and dropped connections are worth retrying"""
+    if getattr(error, 'status_code', None) in TRANSIENT_STATUS_CODES:
+        return True
+    if isinstance(error, ServiceResponseError):
+        return True
+    message = str(error).lower()
+    return 'rate limit' in message or 'quota' in message
+
+# The analyze calls run with the SDK retry policy off (retry_total=0), so this is
+# the one place their backoff, jitter and Retry-After handling happen, for the
+# submit and for the status polls alike.
+# Jitter keeps documents throttled together from all retrying on the same tick
+_BACKOFF = wait_exponential(multiplier=1, min=1, max=AZURE_RETRY_MAX_WAIT) + wait_random(0, 0.5)
+
+# Same headers azure-core's RetryPolicy reads, most precise first; (name, seconds per unit)
+RETRY_AFTER_HEADERS = (('retry-after-ms', 0.001), ('x-ms-retry-after-ms', 0.001), ('Retry-After', 1))
+
+def _retry_after_seconds(error: Exception):
+    """Seconds the service asked us to wait before retrying, if it said"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    for name, unit in RETRY_AFTER_HEADERS:
+        try:
+            return float(headers[name]) * unit
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+def _retry_wait(retry_state) -> float:
+    """Exponential backoff with jitter, stretched to the service's retry-after hint
+    
+    A throttled status poll waits this long and then resumes the same operation.
+    """
+    delay = _BACKOFF(retry_state)
+    retry_after = _retry_after_seconds(retry_state.outcome.exception())
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, AZURE_RETRY_MAX_WAIT))
+    return delay
 
 class AzureDocumentProcessor:
-    def __init__(self):
-        self.client = DocumentIntelligenceClient(
+    def create_async_client(self) -> AsyncDocumentIntelligenceClient:
+        """Async client for one event loop; share it across that loop's documents"""
+        return AsyncDocumentIntelligenceClient(
             endpoint=AZURE_DOC_INTELLIGENCE_ENDPOINT,
             credential=AzureKeyCredential(AZURE_DOC_INTELLIGENCE_KEY)
         )
     
-    def analyze_document(self, file_bytes: bytes, filename: str = None) -> tuple:
-        """Analyze document using prebuilt-layout model with figures output"""
+    async def analyze_document_async(self, document: Union[bytes, IO[bytes]], filename: str = None, progress_callback=None,
+                                     async_client: AsyncDocumentIntelligenceClient = None) -> tuple:
+        """Analyze a document with the prebuilt-layout model and figures output
         
-        # Determine content type based on file extension
+        document may be raw bytes or a binary file-like object; file-likes are
+        streamed as the request body instead of being buffered first. The event
+        loop is free while the poller waits.
+        
+        Pass an open async_client to reuse its connection pool across documents;
+        otherwise one is opened and closed for this call. Figure images are
+        downloaded concurrently before a call-owned client closes.
+        Returns (result, figure_images, operation_id) where figure_images maps
+        figure id to a temporary file holding the image; the caller closes them.
+        """
         content_type = self._get_content_type(filename)
         
         try:
-            # Use the layout model with figures output for comprehensive extraction
-            print(f"🔍 Analyzing document with figures extraction enabled...")
-            
-            poller = self.client.begin_analyze_document(
-                "prebuilt-layout",
-                file_bytes,
-                content_type=content_type,
-                output=[AnalyzeOutputOption.FIGURES]  # Enable figures extraction
-            )
+            print(f"🔍 Analyzing {filename} with figures extraction enabled...")
             
-            result = poller.result()
-            operation_id = poller.details.get("operation_id") if hasattr(poller, 'details') else None
-            
-            # Log what was found for debugging
-            self._log_analysis_results(result)
+            async with AsyncExitStack() as stack:
+                if async_client is None:
+                    async_client = await stack.enter_async_context(self.create_async_client())
+                
+                # Submitting uploads the document and starts a billed analysis, so it
+                # is only repeated when Azure didn't accept the request
+                async for attempt in AsyncRetrying(**self._retry_policy(progress_callback)):
+                    with attempt:
+                        self._rewind(document)
+                        poller = await async_client.begin_analyze_document(
+                            "prebuilt-layout",
+                            document,
+                            content_type=content_type,
+                            output=[AnalyzeOutputOption.FIGURES],
+                            retry_total=0
+                        )
+                
+                # A failed status check resumes polling the same operation from its
+                # continuation token instead of submitting the document again
+                continuation_token = poller.continuation_token()
+                async for attempt in AsyncRetrying(**self._retry_policy(
+                    progress_callback, AZURE_POLL_RETRY_ATTEMPTS, "checking status again"
+                )):
+                    with attempt:
+                        if attempt.retry_state.attempt_number > 1:
+                            poller = await async_client.begin_analyze_document(
+                                "prebuilt-layout",
+                                None,
+                                continuation_token=continuation_token,
+                                retry_total=0
+                            )
+                        result = await poller.result()
+                
+                operation_id = poller.details.get("operation_id") if hasattr(poller, 'details') else None
+                
+                self._log_analysis_results(result)
+                
+                figure_images = await self._download_figures_async(async_client, result, operation_id)
             
-            return result, self.client, operation_id
+            return result, figure_images, operation_id
             
         except Exception as e:
             print(f"Error during Azure Document Intelligence analysis: {e}")
             raise e
     
+    async def _download_figures_async(self, async_client, result, operation_id) -> Dict[str, IO[bytes]]:
+        """Fetch all figure images concurrently, at most FIGURE_DOWNLOAD_CONCURRENCY at a time
+        
+        Each image is streamed into a temporary file as it arrives, so memory
+        stays flat however many figures the document has.
+        """
+        figures = [figure for figure in (getattr(result, 'figures', None) or []) if figure.id]
+        if not figures or not operation_id:
+            return {}
+        
+        semaphore = asyncio.Semaphore(FIGURE_DOWNLOAD_CONCURRENCY)
+        
+        async def _download(figure):
+            async with semaphore:
+                response = await async_client.get_analyze_result_figure(
+                    model_id=result.model_id,
+                    result_id=operation_id,
+                    figure_id=figure.id
+                )
+                image_file = tempfile.TemporaryFile()
+                try:
+                    async for chunk in response:
+                        image_file.write(chunk)
+                except BaseException:
+                    image_file.close()
+                    raise
+                image_file.seek(0)
+                return image_file
+        
+        downloads = await asyncio.gather(*[_download(figure) for figure in figures], return_exceptions=True)
+        
+        figure_images = {}
+        for figure, image_file in zip(figures, downloads):
+            if isinstance(image_file, Exception):
+                print(f"❌ Error downloading image for figure {figure.id}: {image_file}")
+            else:
+                figure_images[figure.id] = image_file
+        
+        return figure_images
+    
+    def _retry_policy(self, progress_callback=None, attempts: int = AZURE_RETRY_ATTEMPTS,
+                      next_step: str = "retrying") -> dict:
+        """Backoff settings for submitting an analysis and for resuming its polling
+        
+        This is the only retry layer for analyze: the calls pass retry_total=0,
+        which also covers the poller's status requests, so the SDK's own
+        RetryPolicy doesn't multiply the attempts and waits made here.
+        """
+        def before_sleep(retry_state):
+            message = (
+                f"⏳ Azure Document Intelligence busy ({retry_state.outcome.exception()}); "
+                f"{next_step} in {retry_state.next_action.sleep:.0f}s..."
+            )
+            print(message)
+            if progress_callback:
+                progress_callback(message)
+        
+        return {
+            "retry": retry_if_exception(_is_transient_error),
+            "stop": stop_after_attempt(attempts),
+            "wait": _retry_wait,
+            "before_sleep": before_sleep,
+            "reraise": True
+        }
+    
+    @staticmethod
+    def _rewind(document):
+        """Reset a streamed body so a retry uploads the whole document again"""
+        if hasattr(document, 'seek'):
+            document.seek(0)
+    
     def _get_content_type(self, filename: str) -> str:
         """Determine content type from filename"""
         if not filename:
             return "application/pdf"  # Default
         
-        extension = filename.lower().split('.')[-1]
-        content_types = {
-            'pdf': 'application/pdf',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'doc': 'application/msword',
-            'xls': 'application/vnd.ms-excel'
-        }
+        # Only the text after the last dot matters; no need to split the whole name
+        extension = filename.lower().rpartition('.')[2]
         
-        return content_types.get(extension, 'application/pdf')
+        return CONTENT_TYPES.get(extension, 'application/pdf')
     
     def _log_analysis_results(self, result):
         """Log analysis results for debugging"""
@@ -72,16 +235,20 @@ class AzureDocumentProcessor:
             figures_count = len(result.figures) if result.figures else 0
             print(f"   - Figures found: {figures_count}")
             
-            # Check which figures have IDs (extractable images)
+            # Check which figures have IDs (extractable images), counting and
+            # formatting the details in the same pass
             if result.figures:
-                figures_with_ids = sum(1 for fig in result.figures if fig.id)
-                print(f"   - Figures with extractable images: {figures_with_ids}")
-                
-                # Log figure details
+                figures_with_ids = 0
+                figure_lines = []
                 for i, figure in enumerate(result.figures):
                     page_num = getattr(figure.bounding_regions[0], 'page_number', 'Unknown') if figure.bounding_regions else 'Unknown'
+                    if figure.id:
+                        figures_with_ids += 1
                     has_id = "✅" if figure.id else "❌"
-                    print(f"     Figure {i+1}: Page {page_num}, ID: {has_id}")
+                    figure_lines.append(f"     Figure {i+1}: Page {page_num}, ID: {has_id}")
+                
+                print(f"   - Figures with extractable images: {figures_with_ids}")
+                print("\n".join(figure_lines))
         
         if hasattr(result, 'pages'):
             print(f"   - Pages analyzed: {len(result.pages) if result.pages else 0}")
@@ -1,11 +1,22 @@
-import os
+from bisect import bisect_right
 import pandas as pd
-from typing import List, Dict
+from PIL import Image
+from typing import Iterator, List, Dict, Tuple
 from storage.local_storage import LocalStorage
+from config import UPLOAD_COPY_CHUNK_SIZE
 import re
 import uuid
 from datetime import datetime
 
+# Compiled once; the chunker applies these to every section of every document
+SECTION_HEADING_MARKER = '[ParagraphRole.SECTION_HEADING]'
+SECTION_HEADING_RE = re.compile(re.escape(SECTION_HEADING_MARKER))
+NUMBERED_SECTION_RE = re.compile(r'^\s*(\d+\.\d+)\s+([A-Z\s]+)')
+CLEANUP_TAGS_RE = re.compile(r'\[None\]\s*|\[ParagraphRole\.[^\]]+\]')
+# Blank-line runs and space runs in one scan; tabs are turned into spaces beforehand
+WHITESPACE_RUNS_RE = re.compile(r'\n\s*\n\s*\n+| {2,}')
+NUMBERED_LINE_RE = re.compile(r'^\d+\.?\d*\s+[A-Z]')
+
 class SimpleChunker:
     """Simple text chunker for basic document processing"""
     
@@ -13,9 +24,9 @@ class SimpleChunker:
         self.max_chunk_size = max_chunk_size
         self.overlap = overlap
         self.section_patterns = {
-            'section_heading': r'\[ParagraphRole\.SECTION_HEADING\]',
-            'numbered_section': r'^\s*(\d+\.\d+)\s+([A-Z\s]+)',
-            'cleanup_tags': r'\[None\]\s*|\[ParagraphRole\.[^\]]+\]'
+            'section_heading': SECTION_HEADING_RE,
+            'numbered_section': NUMBERED_SECTION_RE,
+            'cleanup_tags': CLEANUP_TAGS_RE
         }
     
     def chunk_text(self, text: str) -> List[Dict]:
@@ -24,23 +35,25 @@ class SimpleChunker:
         print(f"   Input text length: {len(text)} characters")
         
         chunks = []
+        # One timestamp for the whole document instead of formatting one per chunk
+        created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Split by sections first
         sections = self._split_by_sections(text)
         print(f"   Found {len(sections)} sections")
         
+        # Sections come back stripped and _clean_text strips, so truthiness is enough here
         for idx, section in enumerate(sections):
-            if section.strip():
+            if section:
                 cleaned_section = self._clean_text(section)
-                if cleaned_section.strip():
+                if cleaned_section:
                     # If section is too large, split it further
                     if len(cleaned_section) > self.max_chunk_size:
-                        sub_chunks = self._split_large_section(cleaned_section)
-                        for sub_idx, sub_chunk in enumerate(sub_chunks):
-                            chunk = self._create_chunk(sub_chunk, f"{idx+1}.{sub_idx+1}")
+                        for sub_idx, sub_chunk in enumerate(self._split_large_section(cleaned_section)):
+                            chunk = self._create_chunk(sub_chunk, f"{idx+1}.{sub_idx+1}", created_at)
                             chunks.append(chunk)
                     else:
-                        chunk = self._create_chunk(cleaned_section, str(idx+1))
+                        chunk = self._create_chunk(cleaned_section, str(idx+1), created_at)
                         chunks.append(chunk)
         
         print(f"   Created {len(chunks)} chunks")
@@ -48,97 +61,95 @@ class SimpleChunker:
     
     def _split_by_sections(self, text: str) -> List[str]:
         """Split text by sections"""
-        # Try splitting by section headings first
-        sections = re.split(f'({self.section_patterns["section_heading"]})', text)
-        
-        # Combine heading markers with following content
-        combined_sections = []
-        i = 0
-        while i < len(sections):
-            section = sections[i].strip()
-            if not section:
-                i += 1
-                continue
-                
-            if re.match(self.section_patterns['section_heading'], section):
-                if i + 1 < len(sections):
-                    next_section = sections[i + 1].strip()
-                    combined_sections.append(section + '\n' + next_section)
-                    i += 2
-                else:
-                    combined_sections.append(section)
-                    i += 1
-            else:
-                combined_sections.append(section)
-                i += 1
+        # Try splitting by section headings first; the marker is a literal, so str.split will do
+        sections = text.split(SECTION_HEADING_MARKER)
+        
+        # Combine heading markers with following content; every piece after the first followed a marker
+        combined_sections = [sections[0].strip()] if sections[0].strip() else []
+        for content in sections[1:]:
+            combined_sections.append(SECTION_HEADING_MARKER + '\n' + content.strip())
         
         # If we didn't get good results, try paragraph splitting
         if len(combined_sections) <= 1:
-            combined_sections = [s.strip() for s in text.split('\n\n') if s.strip()]
+            combined_sections = [s for part in text.split('\n\n') if (s := part.strip())]
         
         return combined_sections
     
-    def _split_large_section(self, section: str) -> List[str]:
-        """Split large sections into smaller chunks"""
-        chunks = []
-        current_chunk = ""
+    def _split_large_section(self, section: str) -> Iterator[str]:
+        """Split large sections into smaller chunks, yielding each as it is completed"""
+        # Paragraphs of the chunk being built; joined only when it is flushed
+        current_paragraphs = []
+        current_length = 0
         
         # Split by paragraphs
-        paragraphs = [p.strip() for p in section.split('\n\n') if p.strip()]
+        paragraphs = [p for part in section.split('\n\n') if (p := part.strip())]
         
         for paragraph in paragraphs:
-            test_chunk = current_chunk + '\n\n' + paragraph if current_chunk else paragraph
+            test_length = current_length + 2 + len(paragraph) if current_paragraphs else len(paragraph)
             
-            if len(test_chunk) > self.max_chunk_size and current_chunk:
-                chunks.append(current_chunk.strip())
+            if test_length > self.max_chunk_size and current_paragraphs:
+                current_chunk = '\n\n'.join(current_paragraphs)
+                yield current_chunk.strip()
                 # Add overlap from previous chunk
                 if self.overlap > 0 and len(current_chunk) > self.overlap:
-                    current_chunk = current_chunk[-self.overlap:] + '\n\n' + paragraph
+                    current_paragraphs = [current_chunk[-self.overlap:], paragraph]
+                    current_length = self.overlap + 2 + len(paragraph)
                 else:
-                    current_chunk = paragraph
+                    current_paragraphs = [paragraph]
+                    current_length = len(paragraph)
             else:
-                current_chunk = test_chunk
+                current_paragraphs.append(paragraph)
+                current_length = test_length
         
+        current_chunk = '\n\n'.join(current_paragraphs)
         if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-        
-        return chunks
+            yield current_chunk.strip()
     
     def _clean_text(self, text: str) -> str:
         """Clean text but preserve important content"""
-        # Remove Azure DI tags
-        cleaned = re.sub(self.section_patterns['cleanup_tags'], '', text)
+        # Remove Azure DI tags; every tag starts with "[", so tag-free text skips the regex
+        cleaned = self.section_patterns['cleanup_tags'].sub('', text) if '[' in text else text
         
         # Normalize whitespace
-        cleaned = re.sub(r'\n\s*\n\s*\n+', '\n\n', cleaned)
-        cleaned = re.sub(r'[ \t]+', ' ', cleaned)
+        cleaned = cleaned.replace('\t', ' ')
+        cleaned = WHITESPACE_RUNS_RE.sub(self._normalize_whitespace_run, cleaned)
         
         return cleaned.strip()
     
+    @staticmethod
+    def _normalize_whitespace_run(match) -> str:
+        return '\n\n' if match.group()[0] == '\n' else ' '
+    
     def _extract_section_info(self, content: str) -> Dict:
         """Extract section information"""
         # Try numbered section pattern first
-        match = re.search(self.section_patterns['numbered_section'], content)
+        match = self.section_patterns['numbered_section'].search(content)
         if match:
             return {
                 'section_no': match.group(1),
                 'section_name': match.group(2).strip()
             }
         
-        # Find first meaningful line
-        lines = content.split('\n')
+        # Find first meaningful line; scan lazily instead of splitting the whole chunk
         first_line = None
-        
-        for line in lines:
-            line = line.strip()
-            if line and not re.match(r'^\[.*\]$', line):
+        start = 0
+        
+        while start <= len(content):
+            end = content.find('\n', start)
+            if end == -1:
+                end = len(content)
+            line = content[start:end].strip()
+            # Skip bare role markers such as "[None]"
+            if line and not (line.startswith('[') and line.endswith(']')):
                 first_line = line
                 break
+            start = end + 1
         
         if first_line:
-            if (first_line.isupper() or 
-                re.match(r'^\d+\.?\d*\s+[A-Z]', first_line) or
-                len(first_line) < 100):
+            # Cheapest test first; the regex only runs for long mixed-case lines
+            if (len(first_line) < 100 or
+                first_line.isupper() or
+                NUMBERED_LINE_RE.match(first_line)):
                 return {
                     'section_no': 'auto',
                     'section_name': first_line[:50]
@@ -149,22 +160,23 @@ class SimpleChunker:
             'section_name': first_line[:50] if first_line else 'UNKNOWN_SECTION'
         }
     
-    def _create_chunk(self, content: str, section_id: str) -> Dict:
+    def _create_chunk(self, content: str, section_id: str, created_at: str = None) -> Dict:
         """Create chunk with metadata"""
         section_info = self._extract_section_info(content)
+        char_count = len(content)
         
         return {
-            'chunk_id': str(uuid.uuid4())[:8],
+            'chunk_id': uuid.uuid4().hex[:8],
             'section_id': section_id,
             'section_name': section_info['section_name'],
             'section_no': section_info['section_no'],
             'content': content,
             'content_type': 'text',
             'metadata': {
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'created_at': created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'word_count': len(content.split()),
-                'char_count': len(content),
-                'chunk_size': len(content)
+                'char_count': char_count,
+                'chunk_size': char_count
             }
         }
 
@@ -175,32 +187,30 @@ class ContentExtractor:
         self.storage = LocalStorage()
         self.chunker = SimpleChunker()
     
-    def extract_all_content(self, result, filename: str, client=None, operation_id=None) -> Dict:
-        """Extract text, tables, and images from Azure Document Intelligence result"""
-        base_filename = os.path.splitext(filename)[0]
+    def extract_all_content(self, result, filename: str, figure_images=None) -> Dict:
+        """Extract text, tables, and images from Azure Document Intelligence result
+        
+        figure_images maps figure id to a file holding that figure's already
+        downloaded image; figures without one are kept as text only.
+        """
+        base_filename = self.storage.base_filename(filename)
         
         print(f"🔍 Extracting content from {filename}...")
         
+        # Tables and figures are saved as they're extracted; clear what an earlier
+        # run left under this name so no stale files mix in with the new ones
+        self.storage.cleanup_files(filename)
+        
         # Extract content using Azure DI
         text_elements = self._extract_text(result)
         tables = self._extract_tables(result, base_filename)
-        images = self._extract_images(result, base_filename, client, operation_id)
+        images = self._extract_images(result, base_filename, figure_images)
         
         # Create combined text with role markers
         combined_text = self._combine_text_elements(text_elements)
-        print(combined_text)
-        section_text = combined_text.split("[ParagraphRole.SECTION_HEADING]")
-        processed_sections = []
-        for section in section_text:
-            section = section.replace("[None] ", "")
-            section = section.replace("\n\n", "")
-            processed_sections.append(section.strip())
-        
-        print("Printing processed section:\n\n")
-        for section in processed_sections:
-            print("\n", section)
+        
         # Create text chunks
-        text_chunks = self.chunker.chunk_text(combined_text) if combined_text.strip() else []
+        text_chunks = self.chunker.chunk_text(combined_text) if combined_text else []
         
         # Save content to local storage
         self._save_content(base_filename, combined_text, text_chunks, tables, images)
@@ -230,11 +240,12 @@ class ContentExtractor:
         
         if hasattr(result, 'paragraphs') and result.paragraphs:
             for para_idx, paragraph in enumerate(result.paragraphs):
-                if self._is_excluded_content(paragraph, excluded_spans):
+                # Blank paragraphs are dropped before the span lookup; isspace() needs no copy
+                content = paragraph.content or ""
+                if not content or content.isspace():
                     continue
                 
-                content = paragraph.content or ""
-                if content.strip():
+                if not self._is_excluded_content(paragraph, excluded_spans):
                     text_elements.append({
                         "content": content,
                         "role": getattr(paragraph, "role", "unknown"),
@@ -270,103 +281,87 @@ class ContentExtractor:
         
         return tables
     
-    def _extract_images(self, result, base_filename: str, client=None, operation_id=None) -> List[Dict]:
+    def _extract_images(self, result, base_filename: str, figure_images=None) -> List[Dict]:
         """Extract figures/images"""
         images = []
-        
-        if hasattr(result, 'figures') and result.figures:
-            for fig_idx, figure in enumerate(result.figures):
-                try:
-                    # Extract text content from figure
-                    text_content = self._extract_figure_content(figure, result)
-                    page_number = getattr(figure.bounding_regions[0], 'page_number', 1) if figure.bounding_regions else 1
-                    
-                    image_data = {
-                        "content": text_content or f"Figure from page {page_number}",
-                        "page_number": page_number,
-                        "figure_index": fig_idx + 1,
-                        "type": "figure",
-                        "image_path": None,
-                        "image_base64": None,
-                        "width": None,
-                        "height": None
-                    }
-                    
-                    # Try to extract actual image
-                    if figure.id and client and operation_id:
-                        try:
-                            image_response = client.get_analyze_result_figure(
-                                model_id=result.model_id,
-                                result_id=operation_id,
-                                figure_id=figure.id
-                            )
-                            
-                            image_bytes = b''.join(image_response)
-                            
-                            if image_bytes:
-                                image_path = self.storage.save_figure_image_bytes(
-                                    image_bytes, 
-                                    base_filename, 
-                                    fig_idx + 1
-                                )
-                                
-                                if image_path:
-                                    import base64
-                                    img_base64 = base64.b64encode(image_bytes).decode()
-                                    
-                                    image_data.update({
-                                        "image_path": image_path,
-                                        "image_base64": img_base64,
-                                        "type": "figure_with_image"
-                                    })
-                                    
-                                    # Get image dimensions
-                                    try:
-                                        from PIL import Image
-                                        from io import BytesIO
-                                        img = Image.open(BytesIO(image_bytes))
-                                        image_data.update({
-                                            "width": img.width,
-                                            "height": img.height
-                                        })
-                                    except:
-                                        pass
-                                
-                                print(f"✅ Extracted image for figure {fig_idx + 1}")
-                                
-                        except Exception as e:
-                            print(f"❌ Error extracting image for figure {fig_idx + 1}: {e}")
-                    
-                    # Save text content if available
-                    if text_content and text_content.strip():
-                        self.storage.save_figure_text(text_content, base_filename, fig_idx + 1)
-                    
-                    images.append(image_data)
-                    
-                except Exception as e:
-                    print(f"❌ Error processing figure {fig_idx + 1}: {e}")
-                    continue
+        figures = getattr(result, 'figures', None) or []
+        figure_images = figure_images or {}
+        
+        for fig_idx, figure in enumerate(figures):
+            try:
+                # Extract text content from figure
+                text_content = self._extract_figure_content(figure, result)
+                page_number = getattr(figure.bounding_regions[0], 'page_number', 1) if figure.bounding_regions else 1
+                
+                image_data = {
+                    "content": text_content or f"Figure from page {page_number}",
+                    "page_number": page_number,
+                    "figure_index": fig_idx + 1,
+                    "type": "figure",
+                    "image_path": None,
+                    "width": None,
+                    "height": None
+                }
+                
+                # Save the actual image, if one was downloaded
+                image_file = figure_images.get(figure.id) if figure.id else None
+                if image_file:
+                    image_data.update(self._save_figure_image(image_file, fig_idx, base_filename))
+                
+                # Save text content if available
+                if text_content:
+                    self.storage.save_figure_text(text_content, base_filename, fig_idx + 1)
+                
+                images.append(image_data)
+                
+            except Exception as e:
+                print(f"❌ Error processing figure {fig_idx + 1}: {e}")
+                continue
         
         return images
     
+    def _save_figure_image(self, image_file, fig_idx: int, base_filename: str) -> Dict:
+        """Copy one downloaded figure image to disk; returns the image fields for its entry, empty on failure"""
+        try:
+            image_path = self.storage.save_figure_image_stream(
+                iter(lambda: image_file.read(UPLOAD_COPY_CHUNK_SIZE), b''),
+                base_filename,
+                fig_idx + 1
+            )
+            if not image_path:
+                return {}
+            
+            image_fields = {
+                "image_path": image_path,
+                "type": "figure_with_image"
+            }
+            
+            # Get image dimensions; PIL only reads the header here
+            try:
+                with Image.open(image_path) as img:
+                    image_fields.update({
+                        "width": img.width,
+                        "height": img.height
+                    })
+            except Exception:
+                pass
+            
+            print(f"✅ Extracted image for figure {fig_idx + 1}")
+            return image_fields
+            
+        except Exception as e:
+            print(f"❌ Error extracting image for figure {fig_idx + 1}: {e}")
+            return {}
+    
     def _combine_text_elements(self, text_elements: List[Dict]) -> str:
         """Combine text elements with role markers"""
-        if not text_elements:
-            return ""
-        
-        combined_parts = []
-        for element in text_elements:
-            role = element.get('role', 'unknown')
-            content = element.get('content', '')
-            if content.strip():
-                combined_parts.append(f"[{role}] {content}")
-        
-        return "\n\n".join(combined_parts)
+        # _extract_text only emits elements with a role and non-blank content
+        return "\n\n".join(f"[{element['role']}] {element['content']}" for element in text_elements)
     
     def _save_content(self, base_filename: str, raw_text: str, text_chunks: List[Dict], tables: List[Dict], images: List[Dict]):
         """Save extracted content to local storage"""
         # Save raw text
-        if raw_text.strip():
+        if raw_text and not raw_text.isspace():
             self.storage.save_raw_text(raw_text, base_filename)
         
         # Save text chunks
@@ -397,8 +392,8 @@ class ContentExtractor:
         else:
             df = pd.DataFrame(grid)
         
-        # Clean up empty rows/columns
-        df = df.dropna(how='all').loc[:, (df != '').any(axis=0)]
+        # Drop empty columns; cells are never NaN here, so rows need no dropna copy
+        df = df.loc[:, (df != '').any(axis=0)]
         return df
     
     def _extract_figure_content(self, figure, result) -> str:
@@ -407,41 +402,48 @@ class ContentExtractor:
             content_parts = []
             for span in figure.spans:
                 try:
-                    span_content = result.content[span.offset:span.offset + span.length]
-                    if span_content.strip():
-                        content_parts.append(span_content.strip())
+                    span_content = result.content[span.offset:span.offset + span.length].strip()
+                    if span_content:
+                        content_parts.append(span_content)
                 except:
                     continue
             return " ".join(content_parts)
         return ""
     
-    def _get_excluded_spans(self, result) -> set:
-        """Get character spans that belong to tables and figures"""
-        excluded_spans = set()
+    def _get_excluded_spans(self, result) -> Tuple[List[int], List[int]]:
+        """Get character spans that belong to tables and figures
+        
+        Returned as (starts, ends) of sorted, merged half-open intervals rather
+        than a set of every excluded character offset.
+        """
+        intervals = []
+        
+        # Exclude table and figure spans
+        for element in (getattr(result, 'tables', None) or []) + (getattr(result, 'figures', None) or []):
+            for span in getattr(element, 'spans', None) or []:
+                if span.length > 0:
+                    intervals.append((span.offset, span.offset + span.length))
+        
+        starts, ends = [], []
+        for start, end in sorted(intervals):
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
         
-        # Exclude table spans
-        if hasattr(result, 'tables') and result.tables:
-            for table in result.tables:
-                if hasattr(table, 'spans'):
-                    for span in table.spans:
-                        for i in range(span.offset, span.offset + span.length):
-                            excluded_spans.add(i)
-        
-        # Exclude figure spans
-        if hasattr(result, 'figures') and result.figures:
-            for figure in result.figures:
-                if hasattr(figure, 'spans'):
-                    for span in figure.spans:
-                        for i in range(span.offset, span.offset + span.length):
-                            excluded_spans.add(i)
-        
-        return excluded_spans
+        return starts, ends
     
-    def _is_excluded_content(self, paragraph, excluded_spans: set) -> bool:
+    def _is_excluded_content(self, paragraph, excluded_spans: Tuple[List[int], List[int]]) -> bool:
         """Check if paragraph content overlaps with excluded spans"""
+        starts, ends = excluded_spans
         if hasattr(paragraph, 'spans') and paragraph.spans:
             for span in paragraph.spans:
-                span_range = set(range(span.offset, span.offset + span.length))
-                if span_range.intersection(excluded_spans):
+                if span.length <= 0:
+                    continue
+                span_end = span.offset + span.length
+                # Only the last interval starting before span_end can overlap it
+                idx = bisect_right(starts, span_end - 1) - 1
+                if idx >= 0 and ends[idx] > span.offset:
                     return True
         return False
\ No newline at end of file
@@ -1,5 +1,8 @@
 import os
-from config import SUPPORTED_EXTENSIONS
+import hashlib
+import shutil
+import tempfile
+from config import SUPPORTED_EXTENSIONS, UPLOAD_SPOOL_MAX_SIZE, UPLOAD_COPY_CHUNK_SIZE
 
 class FileHandler:
     @staticmethod
@@ -9,9 +12,23 @@ class FileHandler:
         return ext in SUPPORTED_EXTENSIONS
     
     @staticmethod
-    def process_file(uploaded_file) -> bytes:
-        """Convert uploaded file to bytes for Azure processing"""
-        return uploaded_file.read()
+    def spool_file(uploaded_file) -> tempfile.SpooledTemporaryFile:
+        """Copy uploaded file into a spooled temp file in fixed-size chunks, rewound for reading"""
+        buffer = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE)
+        uploaded_file.seek(0)
+        shutil.copyfileobj(uploaded_file, buffer, length=UPLOAD_COPY_CHUNK_SIZE)
+        buffer.seek(0)
+        return buffer
+    
+    @staticmethod
+    def file_digest(file_obj) -> str:
+        """Hash a file's contents in chunks, leaving it rewound"""
+        hasher = hashlib.blake2b(digest_size=16)
+        file_obj.seek(0)
+        for block in iter(lambda: file_obj.read(UPLOAD_COPY_CHUNK_SIZE), b''):
+            hasher.update(block)
+        file_obj.seek(0)
+        return hasher.hexdigest()
     
     @staticmethod
     def get_file_extension(filename: str) -> str:
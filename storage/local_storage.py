@@ -1,11 +1,13 @@
 import os
+import re
 import json
 import pandas as pd
 import base64
-from PIL import Image
-from io import BytesIO
 from config import TABLES_DIR, IMAGES_DIR, TEXT_DIR
-from typing import List, Dict
+from typing import Iterable, List, Dict
+
+# Everything saved for a document is its base filename followed by one of these
+SAVED_FILE_SUFFIX_PATTERN = r'_(?:raw_text\.txt|text_chunks\.json|table_\d+\.csv|figure_\d+\.(?:png|txt))'
 
 class LocalStorage:
     """Handle local storage of extracted content"""
@@ -13,6 +15,19 @@ class LocalStorage:
     def __init__(self):
         self._ensure_directories()
     
+    @staticmethod
+    def base_filename(filename: str) -> str:
+        """Prefix for a document's saved files; keeps the extension so a.pdf and a.docx don't collide"""
+        stem, ext = os.path.splitext(filename)
+        return f"{stem}_{ext[1:].lower()}" if ext else stem
+    
+    def _saved_file_pattern(self, filename: str) -> re.Pattern:
+        """Matches exactly the names of a document's saved files
+        
+        A bare prefix is not enough: a.pdf's "a_pdf_" also starts a_pdf_v2.pdf's files.
+        """
+        return re.compile(re.escape(self.base_filename(filename)) + SAVED_FILE_SUFFIX_PATTERN)
+    
     def _ensure_directories(self):
         """Create storage directories if they don't exist"""
         os.makedirs(TABLES_DIR, exist_ok=True)
@@ -27,26 +42,31 @@ class LocalStorage:
         print(f"💾 Saved table {table_index}: {csv_path}")
         return csv_path
     
-    def save_figure_image_bytes(self, image_bytes: bytes, filename: str, figure_index: int) -> str:
-        """Save figure image from raw bytes data"""
+    def save_figure_image_stream(self, chunks: Iterable[bytes], filename: str, figure_index: int) -> str:
+        """Write figure image chunks straight to disk; Azure DI already returns PNG"""
+        img_filename = f"{filename}_figure_{figure_index}.png"
+        img_path = os.path.join(IMAGES_DIR, img_filename)
+        
         try:
-            img_filename = f"{filename}_figure_{figure_index}.png"
-            img_path = os.path.join(IMAGES_DIR, img_filename)
+            bytes_written = 0
+            with open(img_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    bytes_written += len(chunk)
             
-            # Try to open with PIL to validate and convert to PNG
-            try:
-                img = Image.open(BytesIO(image_bytes))
-                img.save(img_path, "PNG")
-                print(f"💾 Saved figure image: {img_path}")
-            except Exception:
-                # If PIL fails, save raw bytes
-                with open(img_path, 'wb') as f:
-                    f.write(image_bytes)
-                print(f"💾 Saved raw image bytes: {img_path}")
+            if not bytes_written:
+                os.remove(img_path)
+                return None
             
+            print(f"💾 Saved figure image: {img_path}")
             return img_path
         except Exception as e:
             print(f"❌ Error saving figure image {figure_index}: {e}")
+            # Don't leave a truncated image behind for the summary or a later run to pick up
+            try:
+                os.remove(img_path)
+            except OSError:
+                pass
             return None
     
     def save_figure_text(self, text_content: str, filename: str, figure_index: int) -> str:
@@ -129,20 +149,17 @@ class LocalStorage:
     
     def get_storage_summary(self, filename: str) -> Dict:
         """Get summary of all stored files for a document"""
-        base_filename = os.path.splitext(filename)[0]
+        base_filename = self.base_filename(filename)
+        saved_file = self._saved_file_pattern(filename)
         
-        summary = {
-            "base_filename": base_filename,
-            "files": {
-                "text": [],
-                "tables": [],
-                "images": []
-            },
-            "storage_stats": {
-                "total_files": 0,
-                "total_size_mb": 0
-            }
+        # Totals are kept in locals and the nested summary is assembled at the end
+        files = {
+            "text": [],
+            "tables": [],
+            "images": []
         }
+        total_files = 0
+        total_size_mb = 0
         
         # Check each directory for files
         directories = {
@@ -153,42 +170,91 @@ class LocalStorage:
         
         for category, directory in directories.items():
             if os.path.exists(directory):
-                for file in os.listdir(directory):
-                    if file.startswith(base_filename):
-                        file_path = os.path.join(directory, file)
-                        file_size = os.path.getsize(file_path) / (1024 * 1024)  # MB
+                # scandir entries carry the joined path and cache their stat result
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not saved_file.fullmatch(entry.name):
+                            continue
+                        file_size = entry.stat().st_size / (1024 * 1024)  # MB
                         
                         file_info = {
-                            "filename": file,
-                            "path": file_path,
+                            "filename": entry.name,
+                            "path": entry.path,
                             "size_mb": round(file_size, 2)
                         }
                         
-                        summary["files"][category].append(file_info)
-                        summary["storage_stats"]["total_files"] += 1
-                        summary["storage_stats"]["total_size_mb"] += file_size
+                        files[category].append(file_info)
+                        total_files += 1
+                        total_size_mb += file_size
         
-        summary["storage_stats"]["total_size_mb"] = round(summary["storage_stats"]["total_size_mb"], 2)
+        return {
+            "base_filename": base_filename,
+            "files": files,
+            "storage_stats": {
+                "total_files": total_files,
+                "total_size_mb": round(total_size_mb, 2)
+            }
+        }
+    
+    def get_document_manifest(self, filename: str, tables: List[Dict], images: List[Dict]) -> Dict:
+        """Paths of the files saved for a document, None where nothing is on disk
+        
+        Each existing file's (mtime_ns, size) is kept under "fingerprints" so
+        manifest_is_current can tell whether the files were rewritten since.
+        """
+        base_filename = self.base_filename(filename)
+        fingerprints = {}
         
-        return summary
+        def existing(path):
+            if not path:
+                return None
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            fingerprints[path] = (stat.st_mtime_ns, stat.st_size)
+            return path
+        
+        return {
+            "text_chunks": existing(os.path.join(TEXT_DIR, f"{base_filename}_text_chunks.json")),
+            "raw_text": existing(os.path.join(TEXT_DIR, f"{base_filename}_raw_text.txt")),
+            "tables": [existing(table.get("csv_path")) for table in tables],
+            "images": [existing(image.get("image_path")) for image in images],
+            "image_texts": [
+                existing(os.path.join(IMAGES_DIR, f"{base_filename}_figure_{image.get('figure_index', i + 1)}.txt"))
+                for i, image in enumerate(images)
+            ],
+            "fingerprints": fingerprints
+        }
+    
+    def manifest_is_current(self, manifest: Dict) -> bool:
+        """True if every file in the manifest is still on disk, unchanged since it was built"""
+        for path, fingerprint in manifest.get("fingerprints", {}).items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if (stat.st_mtime_ns, stat.st_size) != tuple(fingerprint):
+                return False
+        return True
     
     def cleanup_files(self, filename: str) -> bool:
         """Remove all files associated with a document"""
-        base_filename = os.path.splitext(filename)[0]
+        saved_file = self._saved_file_pattern(filename)
         removed_files = []
         
         directories = [TEXT_DIR, TABLES_DIR, IMAGES_DIR]
         
         for directory in directories:
             if os.path.exists(directory):
-                for file in os.listdir(directory):
-                    if file.startswith(base_filename):
-                        file_path = os.path.join(directory, file)
-                        try:
-                            os.remove(file_path)
-                            removed_files.append(file_path)
-                        except Exception as e:
-                            print(f"❌ Error removing file {file_path}: {e}")
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if saved_file.fullmatch(entry.name):
+                            try:
+                                os.remove(entry.path)
+                                removed_files.append(entry.path)
+                            except Exception as e:
+                                print(f"❌ Error removing file {entry.path}: {e}")
         
         print(f"🗑️ Removed {len(removed_files)} files for {filename}")
         return len(removed_files) > 0
\ No newline at end of file
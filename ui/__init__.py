@@ -0,0 +1,18 @@
+from .css import MAIN_CSS
+from .state import initialize_session_state
+from .processing import render_upload_panel, render_status_panel
+from .sidebar import render_configuration, render_document_selector
+from .tabs import render_text_tab, render_tables_tab, render_images_tab, render_storage_tab
+
+__all__ = [
+    'MAIN_CSS',
+    'initialize_session_state',
+    'render_upload_panel',
+    'render_status_panel',
+    'render_configuration',
+    'render_document_selector',
+    'render_text_tab',
+    'render_tables_tab',
+    'render_images_tab',
+    'render_storage_tab'
+]
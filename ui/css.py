@@ -0,0 +1,44 @@
+MAIN_CSS = """
+<style>
+    .main-header {
+        text-align: center;
+        color: #1f77b4;
+        margin-bottom: 30px;
+    }
+    .content-box {
+        background-color: #f8f9fa;
+        padding: 15px;
+        border-radius: 10px;
+        margin: 10px 0;
+        border-left: 4px solid #1976d2;
+    }
+    .table-box {
+        background-color: #e8f5e8;
+        padding: 15px;
+        border-radius: 10px;
+        margin: 10px 0;
+        border-left: 4px solid #4caf50;
+    }
+    .image-box {
+        background-color: #fff3e0;
+        padding: 15px;
+        border-radius: 10px;
+        margin: 10px 0;
+        border-left: 4px solid #ff9800;
+    }
+    .status-message {
+        background-color: #e3f2fd;
+        padding: 10px;
+        border-radius: 5px;
+        margin: 5px 0;
+        border: 1px solid #1976d2;
+    }
+    .storage-info {
+        background-color: #f3e5f5;
+        padding: 10px;
+        border-radius: 5px;
+        margin: 5px 0;
+        border-left: 4px solid #9c27b0;
+    }
+</style>
+"""
@@ -0,0 +1,170 @@
+import asyncio
+import html
+import queue
+import threading
+import streamlit as st
+from main import document_processor
+from processors import FileHandler
+from config import AZURE_DOC_INTELLIGENCE_ENDPOINT, AZURE_DOC_INTELLIGENCE_KEY
+
+async def _collect_results(job: dict, documents: list):
+    async for name, result in document_processor.process_documents_batch(documents, job["messages"].put):
+        job["results"].put((name, result))
+
+def _run_processing_job(job: dict, documents: list):
+    """Worker thread: process spooled documents, reporting through the job queues
+    
+    Only touches the job dict, never Streamlit, so it needs no script run context.
+    """
+    try:
+        asyncio.run(_collect_results(job, documents))
+    except Exception as e:
+        job["error"] = e
+    finally:
+        for file_buffer, _ in documents:
+            file_buffer.close()
+        job["done"] = True
+
+def _collect_finished_documents(job: dict) -> bool:
+    """Move documents finished so far into session state; True if any arrived"""
+    arrived = False
+    while True:
+        try:
+            name, result = job["results"].get_nowait()
+        except queue.Empty:
+            return arrived
+        
+        arrived = True
+        if isinstance(result, Exception):
+            st.session_state.processing_errors.append((name, result))
+        else:
+            st.session_state.processed_documents[name] = result
+
+def _finish_processing_job(job: dict):
+    """Clear the finished job and record its overall outcome"""
+    st.session_state.processing_job = None
+    
+    if job["error"] is not None:
+        st.session_state.processing_errors.append(("all documents", job["error"]))
+    
+    st.session_state.processing_complete = not st.session_state.processing_errors
+
+def _render_status_messages():
+    if st.session_state.processing_status:
+        status_html = "".join(
+            f'<div class="status-message">{html.escape(status)}</div>'
+            for status in st.session_state.processing_status[-5:]
+        )
+        st.markdown(status_html, unsafe_allow_html=True)
+    else:
+        st.info("Upload and process a document to see status updates")
+
+@st.fragment(run_every=0.5)
+def _processing_status_panel():
+    """Poll the running job; only this fragment reruns until the job finishes"""
+    job = st.session_state.processing_job
+    if job is None:
+        _render_status_messages()
+        return
+    
+    status = st.session_state.processing_status
+    while True:
+        try:
+            message = job["messages"].get_nowait()
+        except queue.Empty:
+            break
+        # Retries and chatty stages repeat themselves; keep one copy of a run
+        if not status or status[-1] != message:
+            status.append(message)
+    
+    # Check done before draining so results queued just before completion aren't missed
+    done = job["done"]
+    arrived = _collect_finished_documents(job)
+    
+    if done:
+        _finish_processing_job(job)
+        st.rerun()
+    
+    # Show each document as soon as it finishes rather than waiting for the batch
+    if arrived:
+        st.rerun()
+    
+    st.info("⏳ Processing documents with Azure Document Intelligence...")
+    _render_status_messages()
+
+def render_upload_panel():
+    """File uploader, process button and outcome of the last job"""
+    st.subheader("📤 Upload Documents")
+    
+    uploaded_files = st.file_uploader(
+        "Choose files",
+        type=['pdf', 'docx', 'xlsx'],
+        accept_multiple_files=True,
+        help="Supported formats: PDF, DOCX, XLSX"
+    )
+    uploaded_names = [f.name for f in uploaded_files]
+    
+    # Check if files were removed
+    if not uploaded_files and st.session_state.current_files:
+        st.session_state.processed_data = None
+        st.session_state.processed_documents = {}
+        st.session_state.processing_status = []
+        st.session_state.current_files = []
+        st.info("Files removed. Upload new documents to process.")
+    
+    if uploaded_files:
+        # Check if file selection changed; keep results for files still uploaded
+        if st.session_state.current_files != uploaded_names:
+            st.session_state.processed_documents = {
+                name: data for name, data in st.session_state.processed_documents.items()
+                if name in uploaded_names
+            }
+            st.session_state.processing_status = []
+            st.session_state.current_files = uploaded_names
+        
+        st.success(f"📁 Files loaded: {len(uploaded_files)}")
+        st.info(f"📊 Total size: {sum(f.size for f in uploaded_files) / 1024:.1f} KB")
+        
+        # Process button
+        job_running = st.session_state.processing_job is not None
+        if st.button("🚀 Process Documents", type="primary", disabled=job_running):
+            if not AZURE_DOC_INTELLIGENCE_ENDPOINT or not AZURE_DOC_INTELLIGENCE_KEY:
+                st.error("Please configure Azure credentials")
+            else:
+                try:
+                    # Spool on the script thread; UploadedFile buffers belong to this session
+                    documents = [(FileHandler.spool_file(f), f.name) for f in uploaded_files]
+                    job = {
+                        "messages": queue.Queue(),
+                        "results": queue.Queue(),
+                        "error": None,
+                        "done": False
+                    }
+                    st.session_state.processing_job = job
+                    st.session_state.processing_errors = []
+                    st.session_state.processing_complete = False
+                    threading.Thread(target=_run_processing_job, args=(job, documents), daemon=True).start()
+                    st.rerun()
+                    
+                except Exception as e:
+                    st.error(f"❌ Error: {str(e)}")
+        
+        # Outcome of the last finished job
+        for name, error in st.session_state.processing_errors:
+            st.error(f"❌ Error processing {name}: {str(error)}")
+        
+        if st.session_state.processing_complete:
+            st.session_state.processing_complete = False
+            st.success("✅ Documents processed successfully!")
+            st.balloons()
+    else:
+        st.info("Upload documents to get started")
+
+def render_status_panel():
+    """Processing status; polls the background job while one is running"""
+    st.subheader("📋 Processing Status")
+    
+    if st.session_state.processing_job is not None:
+        _processing_status_panel()
+    else:
+        _render_status_messages()
@@ -0,0 +1,39 @@
+import streamlit as st
+from config import AZURE_DOC_INTELLIGENCE_ENDPOINT, AZURE_DOC_INTELLIGENCE_KEY
+
+def render_configuration():
+    """Azure configuration status"""
+    st.header("⚙️ Configuration")
+    
+    # Azure status
+    if AZURE_DOC_INTELLIGENCE_ENDPOINT and AZURE_DOC_INTELLIGENCE_KEY:
+        st.success("✅ Azure Document Intelligence configured")
+        st.info("🎯 Using Layout Model for extraction")
+    else:
+        st.error("❌ Azure credentials not configured")
+        st.info("Please set your Azure credentials in config.py or environment variables")
+
+def render_document_selector():
+    """Pick the processed document to display and show its stats"""
+    processed_documents = st.session_state.processed_documents
+    if processed_documents:
+        document_names = list(processed_documents)
+        if len(document_names) > 1:
+            selected_document = st.selectbox("📄 Document", document_names)
+        else:
+            selected_document = document_names[0]
+        st.session_state.processed_data = processed_documents[selected_document]
+    else:
+        st.session_state.processed_data = None
+    
+    # Statistics
+    if st.session_state.processed_data:
+        stats = st.session_state.processed_data.get("stats", {})
+        st.subheader("📊 Document Stats")
+        st.metric("Text Chunks", stats.get("text_count", 0))
+        st.metric("Tables", stats.get("table_count", 0))
+        st.metric("Images", stats.get("image_count", 0))
+        
+        # Storage info
+        st.subheader("💾 Local Storage")
+        st.markdown('<div class="storage-info">Content saved to:<br/>• Text: extracted_content/text/<br/>• Tables: extracted_content/tables/<br/>• Images: extracted_content/images/</div>', unsafe_allow_html=True)
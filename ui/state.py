@@ -0,0 +1,17 @@
+import streamlit as st
+
+def initialize_session_state():
+    if 'processed_data' not in st.session_state:
+        st.session_state.processed_data = None
+    if 'processing_status' not in st.session_state:
+        st.session_state.processing_status = []
+    if 'processed_documents' not in st.session_state:
+        st.session_state.processed_documents = {}
+    if 'current_files' not in st.session_state:
+        st.session_state.current_files = []
+    if 'processing_job' not in st.session_state:
+        st.session_state.processing_job = None
+    if 'processing_errors' not in st.session_state:
+        st.session_state.processing_errors = []
+    if 'processing_complete' not in st.session_state:
+        st.session_state.processing_complete = False
@@ -0,0 +1,338 @@
+import base64
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import streamlit as st
+from PIL import Image
+from main import document_processor
+
+CHUNK_PREVIEW_CHARS = 2000
+RAW_TEXT_PREVIEW_CHARS = 5000
+FILE_READ_WORKERS = 16
+IMAGE_PREVIEW_SIZE = (1024, 1024)
+# Cache bounds, sized for the last few documents; every reprocess adds new entries
+FILE_CACHE_MAX_ENTRIES = 16  # raw text and chunk JSON, two per document
+FILE_SET_CACHE_MAX_ENTRIES = 16  # all tables or all figures of a document, two per document
+IMAGE_CACHE_MAX_ENTRIES = 256  # decoded figures and their previews, one per figure
+
+@st.cache_data(show_spinner=False, max_entries=FILE_CACHE_MAX_ENTRIES)
+def _read_bytes(path: str, mtime: float) -> bytes:
+    """Read a file for download; keyed on mtime so a rewritten file is re-read"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+@st.cache_data(show_spinner=False, max_entries=FILE_SET_CACHE_MAX_ENTRIES)
+def _read_files(paths_and_mtimes: tuple) -> list:
+    """Read several files concurrently; keyed on mtimes so rewritten files are re-read"""
+    with ThreadPoolExecutor(max_workers=FILE_READ_WORKERS) as executor:
+        return list(executor.map(_read_file, [path for path, _ in paths_and_mtimes]))
+
+def _mtime(path):
+    """Modification time, or None if the file is gone"""
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+def _read_saved_files(paths: list) -> dict:
+    """Contents of the files that still exist, keyed by their index in paths"""
+    existing = [
+        (i, path, mtime) for i, path in enumerate(paths)
+        if (mtime := _mtime(path)) is not None
+    ]
+    return dict(zip(
+        [i for i, _, _ in existing],
+        _read_files(tuple((path, mtime) for _, path, mtime in existing))
+    ))
+
+def _document_manifest(data: dict) -> dict:
+    """Saved file paths for a result; older results without a manifest check disk"""
+    manifest = data.get("manifest")
+    if manifest is None:
+        manifest = document_processor.storage.get_document_manifest(
+            data.get("filename", "unknown"),
+            data.get("tables", []),
+            data.get("images", [])
+        )
+    return manifest
+
+@st.cache_data(show_spinner=False, max_entries=IMAGE_CACHE_MAX_ENTRIES)
+def _decode_image(image_base64: str) -> bytes:
+    """Decode a figure's base64 payload once; st.image takes the PNG bytes directly"""
+    return base64.b64decode(image_base64)
+
+def _inline_image_bytes(image: dict):
+    """Figure bytes embedded as base64 by older results, if any"""
+    if image.get('image_base64'):
+        return _decode_image(image['image_base64'])
+    return None
+
+@st.cache_data(show_spinner=False, max_entries=IMAGE_CACHE_MAX_ENTRIES)
+def _image_preview(image_bytes: bytes) -> bytes:
+    """Downscaled PNG for display; draft() lets JPEG sources decode at reduced size"""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img.draft("RGB", IMAGE_PREVIEW_SIZE)
+        img.thumbnail(IMAGE_PREVIEW_SIZE)
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+def _is_oversized(image: dict) -> bool:
+    """True unless the recorded dimensions already fit the preview size"""
+    width, height = image.get('width'), image.get('height')
+    if not width or not height:
+        return True
+    return width > IMAGE_PREVIEW_SIZE[0] or height > IMAGE_PREVIEW_SIZE[1]
+
+def _chunk_row(chunk, chunk_number: int) -> dict:
+    """Table row for one text chunk; content is truncated for display"""
+    # Plain strings from older results are treated as content-only chunks
+    if not isinstance(chunk, dict):
+        chunk = {"content": str(chunk)}
+    chunk_content = chunk.get("content", "")
+    metadata = chunk.get("metadata", {})
+    
+    return {
+        "#": chunk_number,
+        "chunk_id": chunk.get("chunk_id", f"chunk_{chunk_number}"),
+        "section": chunk.get("section_name", "Unknown Section"),
+        "chars": len(chunk_content),
+        "words": metadata.get("word_count", 0),
+        "content": chunk_content[:CHUNK_PREVIEW_CHARS]
+    }
+
+def render_text_tab(data: dict):
+    """Text chunks with pagination and raw text"""
+    st.subheader("📝 Text Chunks")
+    text_chunks = data.get("text_chunks", [])
+    raw_text = data.get("raw_text", "")
+    
+    if text_chunks:
+        st.info(f"Found {len(text_chunks)} text chunks")
+        
+        # Raw text is served on click rather than embedded in the page. The saved
+        # file's cached bytes are reused so reruns don't re-encode the whole text
+        raw_text_path = _document_manifest(data)["raw_text"]
+        raw_text_mtime = _mtime(raw_text_path)
+        if raw_text_mtime is not None:
+            raw_text_bytes = _read_bytes(raw_text_path, raw_text_mtime)
+        else:
+            raw_text_bytes = raw_text.encode("utf-8")
+        st.download_button(
+            "📥 Download Raw Text",
+            data=raw_text_bytes,
+            file_name=f"{document_processor.storage.base_filename(data.get('filename', 'document'))}_raw_text.txt",
+            mime="text/plain",
+            key="download_raw_text_tab"
+        )
+        if st.checkbox("Preview Raw Text"):
+            st.text_area("Raw Text", raw_text[:RAW_TEXT_PREVIEW_CHARS], height=300, disabled=True)
+            if len(raw_text) > RAW_TEXT_PREVIEW_CHARS:
+                st.caption(f"Showing first {RAW_TEXT_PREVIEW_CHARS:,} of {len(raw_text):,} characters")
+        
+        # Pagination for chunks
+        chunks_per_page = st.selectbox("Chunks per page", [10, 50, 200], index=1)
+        total_pages = (len(text_chunks) - 1) // chunks_per_page + 1
+        
+        if total_pages > 1:
+            page = st.selectbox("Page", range(1, total_pages + 1))
+            start_idx = (page - 1) * chunks_per_page
+            end_idx = min(start_idx + chunks_per_page, len(text_chunks))
+            chunks_to_show = text_chunks[start_idx:end_idx]
+        else:
+            chunks_to_show = text_chunks
+            start_idx = 0
+        
+        # Arrow-backed table; the front end only renders visible rows
+        chunks_df = pd.DataFrame([
+            _chunk_row(chunk, start_idx + i + 1)
+            for i, chunk in enumerate(chunks_to_show)
+        ])
+        st.dataframe(chunks_df, use_container_width=True, hide_index=True, height=600)
+    else:
+        st.warning("No text chunks created")
+
+def render_tables_tab(data: dict):
+    """Extracted tables with CSV downloads"""
+    st.subheader("📊 Extracted Tables")
+    tables = data.get("tables", [])
+    
+    if tables:
+        st.info(f"Found {len(tables)} tables")
+        
+        # Read every CSV for the download buttons in one concurrent, cached pass
+        csv_payloads = _read_saved_files(_document_manifest(data)["tables"])
+        
+        for i, table in enumerate(tables):
+            with st.expander(f"Table {i + 1} - Page {table.get('page_number', 'Unknown')}"):
+                col_a, col_b = st.columns([3, 1])
+                
+                with col_a:
+                    if 'html' in table:
+                        st.markdown("**Table Preview:**")
+                        st.markdown(table['html'], unsafe_allow_html=True)
+                    else:
+                        st.markdown("**Table Content:**")
+                        st.text(table['content'])
+                
+                with col_b:
+                    st.markdown("**Details:**")
+                    st.write(f"Page: {table.get('page_number', 'Unknown')}")
+                    st.write(f"Rows: {table.get('row_count', 'N/A')}")
+                    st.write(f"Columns: {table.get('column_count', 'N/A')}")
+                    
+                    # Download CSV
+                    if i in csv_payloads:
+                        st.download_button(
+                            label="📥 Download CSV",
+                            data=csv_payloads[i],
+                            file_name=os.path.basename(table['csv_path']),
+                            mime="text/csv",
+                            key=f"download_table_{i}"
+                        )
+    else:
+        st.warning("No tables extracted")
+
+def render_images_tab(data: dict):
+    """Extracted figures with image downloads"""
+    st.subheader("🖼️ Extracted Images")
+    images = data.get("images", [])
+    
+    if images:
+        st.info(f"Found {len(images)} images")
+        
+        # Read every saved figure in one concurrent, cached pass
+        image_payloads = _read_saved_files(_document_manifest(data)["images"])
+        
+        for i, image in enumerate(images):
+            image_type = image.get('type', 'figure')
+            
+            with st.expander(f"Image {i + 1} - Page {image.get('page_number', 'Unknown')} ({image_type})"):
+                img_data = image_payloads.get(i) or _inline_image_bytes(image)
+                
+                # Check if actual image is available
+                if img_data:
+                    col_img, col_details = st.columns([2, 1])
+                    
+                    with col_img:
+                        # Display image
+                        try:
+                            # Large scans are shown downscaled; the download keeps the original
+                            preview = _image_preview(img_data) if _is_oversized(image) else img_data
+                            st.image(preview, caption=f"Image from Page {image.get('page_number')}", use_column_width=True)
+                            
+                            # Download button
+                            st.download_button(
+                                label="📥 Download Image",
+                                data=img_data,
+                                file_name=f"image_{i+1}_page_{image.get('page_number', 'unknown')}.png",
+                                mime="image/png",
+                                key=f"download_img_{i}"
+                            )
+                        except Exception as e:
+                            st.error(f"Error displaying image: {e}")
+                    
+                    with col_details:
+                        st.markdown("**Image Details:**")
+                        st.write(f"Page: {image.get('page_number', 'Unknown')}")
+                        st.write(f"Type: {image_type}")
+                        if image.get('width') and image.get('height'):
+                            st.write(f"Size: {image.get('width')} × {image.get('height')}")
+                        if image.get('image_path'):
+                            st.write(f"Saved: {os.path.basename(image.get('image_path'))}")
+                
+                # Show text content from image
+                if image.get('content') and image.get('content') != f"Figure from page {image.get('page_number')}":
+                    st.markdown("**Text Content from Image:**")
+                    st.markdown(f'<div class="image-box">{image.get("content")}</div>', unsafe_allow_html=True)
+                
+                # If no image but has text content
+                if not img_data and image.get('content'):
+                    st.markdown("**Image Content (Text Only):**")
+                    content = image.get("content", "No text content")
+                    st.markdown(f'<div class="image-box">{content}</div>', unsafe_allow_html=True)
+                    st.info("💡 This is text content from a figure/diagram detected by Azure DI.")
+    else:
+        st.warning("No images extracted")
+
+def render_storage_tab(data: dict):
+    """Saved file locations and processing summary"""
+    st.subheader("💾 Storage Information")
+    
+    # Display file paths and storage info
+    filename = data.get("filename", "unknown")
+    base_filename = document_processor.storage.base_filename(filename)
+    tables = data.get("tables", [])
+    images = data.get("images", [])
+    
+    manifest = _document_manifest(data)
+    
+    st.markdown("**Files saved to local storage:**")
+    
+    # Text files
+    st.markdown("**📝 Text Files:**")
+    text_chunks_path = manifest["text_chunks"]
+    raw_text_path = manifest["raw_text"]
+    # Cached results outlive their files; a removed file shows as missing
+    text_chunks_mtime = _mtime(text_chunks_path)
+    raw_text_mtime = _mtime(raw_text_path)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if text_chunks_mtime is not None:
+            st.success(f"✅ Text chunks: {text_chunks_path}")
+            st.download_button(
+                "📥 Download Text Chunks (JSON)",
+                data=_read_bytes(text_chunks_path, text_chunks_mtime),
+                file_name=f"{base_filename}_text_chunks.json",
+                mime="application/json"
+            )
+        else:
+            st.info("No text chunks file")
+    
+    with col2:
+        if raw_text_mtime is not None:
+            st.success(f"✅ Raw text: {raw_text_path}")
+            st.download_button(
+                "📥 Download Raw Text",
+                data=_read_bytes(raw_text_path, raw_text_mtime),
+                file_name=f"{base_filename}_raw_text.txt",
+                mime="text/plain"
+            )
+        else:
+            st.info("No raw text file")
+    
+    # Table files
+    if tables:
+        st.markdown("**📊 Table Files:**")
+        for i, csv_path in enumerate(manifest["tables"]):
+            if csv_path:
+                st.success(f"✅ Table {i+1}: {csv_path}")
+    
+    # Image files
+    if images:
+        st.markdown("**🖼️ Image Files:**")
+        for i, (image_path, text_file) in enumerate(zip(manifest["images"], manifest["image_texts"])):
+            if image_path:
+                st.success(f"✅ Image {i+1}: {image_path}")
+            if text_file:
+                st.success(f"✅ Image {i+1} text: {text_file}")
+    
+    # Summary
+    st.markdown("---")
+    st.markdown("**📈 Processing Summary:**")
+    stats = data.get("stats", {})
+    processing_method = data.get("processing_method", "azure_document_intelligence")
+    
+    st.info(f"""
+    **Processing Method:** {processing_method}
+    **Text Chunks:** {stats.get("text_count", 0)}
+    **Tables:** {stats.get("table_count", 0)}
+    **Images:** {stats.get("image_count", 0)}
+    **File Extension:** {data.get("file_extension", "unknown")}
+    """)
@@ -3,62 +3,62 @@ import json
 from typing import List
 from config import MAX_CHUNK_SIZE, CHUNK_OVERLAP
 
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+WHITESPACE_RE = re.compile(r'\s+')
+
 def semantic_chunking(text: str, max_chunk_size: int = MAX_CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
     """Create semantic text chunks with overlap"""
     if not text or len(text.strip()) == 0:
         return []
     
     # Split by paragraphs first
-    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+    paragraphs = [p for part in text.split('\n\n') if (p := part.strip())]
     if not paragraphs:
         return []
     
-    chunks = []
-    current_chunk = ""
-    
+    # Long paragraphs are split into sentences, which join with a space
+    pieces = []
     for paragraph in paragraphs:
-        # If paragraph is too long, split by sentences
         if len(paragraph) > max_chunk_size:
-            sentences = re.split(r'(?<=[.!?])\s+', paragraph)
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if not sentence:
-                    continue
-                
-                # Check if adding this sentence would exceed the limit
-                test_chunk = current_chunk + " " + sentence if current_chunk else sentence
-                
-                if len(test_chunk) > max_chunk_size and current_chunk:
-                    # Save current chunk and start new one
-                    chunks.append(current_chunk.strip())
-                    # Add overlap from previous chunk
-                    if overlap > 0 and len(current_chunk) > overlap:
-                        current_chunk = current_chunk[-overlap:] + " " + sentence
-                    else:
-                        current_chunk = sentence
-                else:
-                    current_chunk = test_chunk
+            pieces.extend(
+                (sentence, " ") for sentence in
+                (s.strip() for s in SENTENCE_SPLIT_RE.split(paragraph)) if sentence
+            )
         else:
-            # Check if adding this paragraph would exceed the limit
-            test_chunk = current_chunk + "\n\n" + paragraph if current_chunk else paragraph
-            
-            if len(test_chunk) > max_chunk_size and current_chunk:
-                # Save current chunk and start new one
-                chunks.append(current_chunk.strip())
-                # Add overlap from previous chunk
-                if overlap > 0 and len(current_chunk) > overlap:
-                    current_chunk = current_chunk[-overlap:] + "\n\n" + paragraph
-                else:
-                    current_chunk = paragraph
+            pieces.append((paragraph, "\n\n"))
+    
+    # The chunk is built as a list with its length tracked, not re-concatenated per piece
+    chunks = []
+    current_parts = []
+    current_length = 0
+    
+    for piece, separator in pieces:
+        # Check if adding this piece would exceed the limit
+        test_length = current_length + len(separator) + len(piece) if current_parts else len(piece)
+        
+        if test_length > max_chunk_size and current_parts:
+            # Save current chunk and start new one
+            current_chunk = "".join(current_parts)
+            chunks.append(current_chunk.strip())
+            # Add overlap from previous chunk
+            if overlap > 0 and len(current_chunk) > overlap:
+                current_parts = [current_chunk[-overlap:], separator, piece]
             else:
-                current_chunk = test_chunk
+                current_parts = [piece]
+            current_length = sum(len(part) for part in current_parts)
+        else:
+            if current_parts:
+                current_parts.append(separator)
+            current_parts.append(piece)
+            current_length = test_length
     
     # Add the last chunk if it exists
+    current_chunk = "".join(current_parts)
     if current_chunk.strip():
         chunks.append(current_chunk.strip())
     
-    # Filter out very small chunks (less than 50 characters)
-    chunks = [chunk for chunk in chunks if len(chunk.strip()) >= 50]
+    # Filter out very small chunks (less than 50 characters); chunks are already stripped
+    chunks = [chunk for chunk in chunks if len(chunk) >= 50]
     
     return chunks
 
@@ -87,11 +87,8 @@ def clean_text(text: str) -> str:
     if not text:
         return ""
     
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove excessive newlines but preserve paragraph breaks
-    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+    # Collapse all whitespace, newlines included, to single spaces
+    text = WHITESPACE_RE.sub(' ', text)
     
     # Clean up quotes and dashes
     text = text.replace('"', '"').replace('"', '"')